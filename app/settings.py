@@ -50,6 +50,7 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'blog.routers.ReplicaStickinessMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -80,9 +81,22 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    # Réplica somente leitura; localmente é um segundo arquivo SQLite
+    # sincronizado com `python manage.py sync_replica`
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db_replica.sqlite3',
+    },
 }
 
+DATABASE_ROUTERS = ['blog.routers.PrimaryReplicaRouter']
+
+REPLICA_DATABASES = ['replica'] # Réplicas usadas pelas views somente leitura
+REPLICA_MAX_LAG = 5 # Segundos desde a última cópia tolerados antes de voltar ao primário
+# (rode `python manage.py sync_replica --interval 2`, abaixo desse limite)
+REPLICA_PIN_SECONDS = 10 # Tempo que um cliente fica no primário depois de escrever
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -0,0 +1,210 @@
+# blog/api.py
+
+import json
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.gzip import gzip_page
+from .models import Post, Category, Comment # importa os modelos
+from .routers import ReplicaReadMixin
+from .views import paginate_keyset
+
+API_PAGE_SIZE = 20 # Quantidade de itens por página na API
+API_CACHE_TIMEOUT = 60 * 60 # As chaves já mudam quando o post é alterado, então o cache pode durar mais
+
+# Campos públicos de cada recurso -> lookup usado no values()
+POST_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'slug': 'slug',
+    'author': 'author__username',
+    'category': 'category__name',
+    'body': 'body',
+    'publish_date': 'publish_date',
+    'updated_at': 'updated_at',
+}
+CATEGORY_FIELDS = {
+    'id': 'id',
+    'name': 'name',
+}
+COMMENT_FIELDS = { # Sem email: não é exposto publicamente
+    'id': 'id',
+    'name': 'name',
+    'body': 'body',
+    'created_at': 'created_at',
+}
+
+
+class InvalidQuery(Exception):
+    """Parâmetro de consulta inválido (fields ou cursor)."""
+
+
+def parse_fields(request, allowed):
+    # Lê o parâmetro ?fields=a,b,c e valida contra os campos permitidos do recurso
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(allowed)
+    fields = list(dict.fromkeys(f.strip() for f in raw.split(',') if f.strip()))
+    unknown = [f for f in fields if f not in allowed]
+    if unknown or not fields:
+        raise InvalidQuery(f"Campos inválidos: {', '.join(unknown) or raw}")
+    return fields
+
+
+def select_fields(row, fields, mapping):
+    # Monta o dicionário de saída com os nomes públicos dos campos
+    return {field: row[mapping[field]] for field in fields}
+
+
+def next_page_url(request, cursor):
+    # Mantém os parâmetros atuais (ex.: fields) e troca apenas o cursor
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params['after'] = cursor
+    return f'{request.path}?{params.urlencode()}'
+
+
+def to_json(data):
+    return json.dumps(data, cls=DjangoJSONEncoder)
+
+
+# Campos que vêm de outras tabelas: ficam fora do cache, pois renomear uma categoria
+# ou um autor não altera Post.updated_at
+RELATED_POST_FIELDS = ('author', 'category')
+
+
+def post_key_lookups(fields):
+    # Colunas da consulta leve: chave do cache + campos relacionados sempre atuais
+    return ['id', 'updated_at', *(POST_FIELDS[f] for f in fields if f in RELATED_POST_FIELDS)]
+
+
+def post_cache_key(pk, updated_at, fields):
+    # A chave inclui updated_at: ao salvar o post, o payload antigo deixa de ser usado
+    return f"blog:api:post:{pk}:{updated_at.timestamp()}:{','.join(sorted(fields))}"
+
+
+def merge_json_objects(first, second):
+    # Junta dois objetos JSON já serializados sem decodificá-los
+    if first == '{}':
+        return second
+    if second == '{}':
+        return first
+    return f'{first[:-1]},{second[1:]}'
+
+
+def serialize_posts(rows, fields):
+    """
+    Recebe linhas de post_key_lookups() e devolve os posts já serializados em JSON,
+    na mesma ordem. Os campos do próprio post vêm do cache por objeto (o banco só é
+    consultado para os que faltam); os relacionados vêm das próprias linhas.
+    """
+    own_fields = [f for f in fields if f not in RELATED_POST_FIELDS]
+    related_fields = [f for f in fields if f in RELATED_POST_FIELDS]
+
+    cached = {}
+    keys = {}
+    if own_fields:
+        keys = {row['id']: post_cache_key(row['id'], row['updated_at'], own_fields) for row in rows}
+        cached = cache.get_many(keys.values())
+
+        missing = [pk for pk, key in keys.items() if key not in cached]
+        if missing:
+            lookups = [POST_FIELDS[field] for field in own_fields]
+            fresh = {}
+            for row in Post.objects.filter(id__in=missing).values('id', *lookups):
+                fresh[keys[row['id']]] = to_json(select_fields(row, own_fields, POST_FIELDS))
+            cache.set_many(fresh, API_CACHE_TIMEOUT)
+            cached.update(fresh)
+
+    payloads = []
+    for row in rows:
+        own = cached.get(keys[row['id']]) if own_fields else '{}'
+        if own is None: # Post removido entre as duas consultas
+            continue
+        payloads.append(merge_json_objects(own, to_json(select_fields(row, related_fields, POST_FIELDS))))
+    return payloads
+
+
+@method_decorator(gzip_page, name='dispatch')
+class ApiView(ReplicaReadMixin, View):
+    """
+    View base da API somente leitura: respostas JSON comprimidas com gzip
+    e erros de consulta devolvidos como 400.
+    """
+    http_method_names = ['get', 'head', 'options']
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except InvalidQuery as exc:
+            return JsonResponse({'detail': str(exc)}, status=400)
+
+    def paginate(self, queryset, field, descending=False):
+        try:
+            return paginate_keyset(queryset, field, after=self.request.GET.get('after'),
+                                   per_page=API_PAGE_SIZE, descending=descending)
+        except (ValueError, OverflowError):
+            raise InvalidQuery('Cursor inválido.')
+
+
+class PostListApiView(ApiView):
+    def get(self, request):
+        fields = parse_fields(request, POST_FIELDS)
+        # Primeiro busca só as chaves (id, updated_at) e os campos relacionados; o resto vem do cache
+        queryset = Post.objects.filter(status='published').values('publish_date', *post_key_lookups(fields))
+        rows, next_cursor = self.paginate(queryset, 'publish_date', descending=True)
+
+        # Monta o JSON juntando os payloads já serializados, sem decodificá-los de novo
+        results = ','.join(serialize_posts(rows, fields))
+        body = f'{{"results":[{results}],"next":{to_json(next_page_url(request, next_cursor))}}}'
+        return HttpResponse(body, content_type='application/json')
+
+
+class PostDetailApiView(ApiView):
+    def get(self, request, slug):
+        fields = parse_fields(request, POST_FIELDS)
+        row = Post.objects.filter(slug=slug, status='published').values(*post_key_lookups(fields)).first()
+        if row is None:
+            raise Http404('Post não encontrado.')
+        payloads = serialize_posts([row], fields)
+        if not payloads: # Post removido entre a consulta leve e o preenchimento do cache
+            raise Http404('Post não encontrado.')
+        return HttpResponse(payloads[0], content_type='application/json')
+
+
+class CategoryListApiView(ApiView):
+    def get(self, request):
+        fields = parse_fields(request, CATEGORY_FIELDS)
+        queryset = Category.objects.order_by('id').values('id', *(CATEGORY_FIELDS[f] for f in fields))
+        after = request.GET.get('after')
+        if after is not None:
+            try:
+                queryset = queryset.filter(id__gt=int(after))
+            except ValueError:
+                raise InvalidQuery('Cursor inválido.')
+
+        rows = list(queryset[:API_PAGE_SIZE + 1])
+        next_cursor = str(rows[API_PAGE_SIZE - 1]['id']) if len(rows) > API_PAGE_SIZE else None
+        return JsonResponse({
+            'results': [select_fields(row, fields, CATEGORY_FIELDS) for row in rows[:API_PAGE_SIZE]],
+            'next': next_page_url(request, next_cursor),
+        })
+
+
+class CommentListApiView(ApiView):
+    def get(self, request, slug):
+        fields = parse_fields(request, COMMENT_FIELDS)
+        post = get_object_or_404(Post.objects.only('id'), slug=slug, status='published')
+        queryset = Comment.objects.filter(post=post, active=True).values(
+            'id', 'created_at', *(COMMENT_FIELDS[f] for f in fields)
+        )
+        rows, next_cursor = self.paginate(queryset, 'created_at')
+        return JsonResponse({
+            'results': [select_fields(row, fields, COMMENT_FIELDS) for row in rows],
+            'next': next_page_url(request, next_cursor),
+        })
@@ -0,0 +1,24 @@
+# blog/management/commands/sync_replica.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.routers import replica_aliases, sync_sqlite_replica
+
+
+class Command(BaseCommand):
+    help = 'Copia o banco primário para as réplicas SQLite (substituto local de replicação).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Repete a sincronização a cada N segundos (0 = apenas uma vez).')
+
+    def handle(self, *args, **options):
+        while True:
+            for alias in replica_aliases():
+                sync_sqlite_replica(alias)
+                self.stdout.write(self.style.SUCCESS(f'Réplica "{alias}" sincronizada.'))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
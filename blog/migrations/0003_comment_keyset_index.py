@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0002_alter_post_slug'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'active', 'created_at', 'id'], name='blog_commen_post_id_ed4f13_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_comment_keyset_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReplicationMarker',
+            fields=[
+                ('name', models.CharField(max_length=20, primary_key=True, serialize=False)),
+                ('timestamp', models.FloatField()),
+            ],
+        ),
+    ]
@@ -51,8 +51,20 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Índice para a paginação por cursor (keyset) dos comentários de um post
+            models.Index(fields=['post', 'active', 'created_at', 'id']),
+        ]
 
     def __str__(self):
         return f'Comment by {self.name} on {self.post}'
 
 
+class ReplicationMarker(models.Model):
+    # Marcador de replicação compartilhado entre processos:
+    # 'synced' em cada réplica, gravado pela sincronização
+    name = models.CharField(max_length=20, primary_key=True)
+    timestamp = models.FloatField()
+
+    def __str__(self):
+        return f'{self.name}: {self.timestamp}'
@@ -0,0 +1,183 @@
+# blog/routers.py
+
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import ReplicationMarker
+
+PRIMARY_DB = 'default'
+SYNCED = 'synced' # Marcador em cada réplica: momento em que a cópia foi iniciada
+PIN_COOKIE = 'db_primary_until' # Cookie que fixa o cliente no primário após uma escrita
+IGNORED_WRITE_APPS = {'sessions'} # Escritas que não afetam o conteúdo lido nas réplicas
+IGNORED_WRITE_MODELS = {'blog.replicationmarker'}
+
+# Réplica escolhida para o bloco de leitura atual (None = usar o primário)
+_replica_alias = ContextVar('replica_alias', default=None)
+# Estado da requisição atual, preenchido pelo middleware: {'pinned': bool, 'wrote': bool}
+_request_state = ContextVar('db_request_state', default=None)
+
+
+def replica_aliases():
+    return list(getattr(settings, 'REPLICA_DATABASES', []))
+
+
+def read_marker(alias, name):
+    # Lê um marcador de replicação no banco indicado (None se não existir)
+    try:
+        return (ReplicationMarker.objects.using(alias)
+                .filter(name=name).values_list('timestamp', flat=True).first())
+    except DatabaseError: # Réplica vazia ou ainda não sincronizada
+        return None
+
+
+def write_marker(alias, name, timestamp=None):
+    timestamp = time.time() if timestamp is None else timestamp
+    ReplicationMarker.objects.using(alias).update_or_create(name=name, defaults={'timestamp': timestamp})
+
+
+def replica_lag(alias, now=None):
+    """
+    Atraso máximo (em segundos) da réplica: tempo desde o início da última cópia.
+    Tudo o que foi confirmado no primário antes desse momento está na réplica, então
+    o valor é um limite seguro mesmo para escritas ainda não confirmadas durante a cópia.
+    Lê apenas o marcador da própria réplica, sem consultar o primário; exige que
+    `sync_replica --interval` rode em intervalo menor que REPLICA_MAX_LAG.
+    Uma réplica que nunca foi sincronizada é considerada infinitamente atrasada.
+    """
+    now = time.time() if now is None else now
+    synced_at = read_marker(alias, SYNCED)
+    if synced_at is None:
+        return float('inf')
+    return max(now - synced_at, 0)
+
+
+def pick_replica():
+    # Escolhe uma réplica atualizada ao acaso; devolve None se todas estiverem atrasadas
+    max_lag = getattr(settings, 'REPLICA_MAX_LAG', 5)
+    fresh = [alias for alias in replica_aliases() if replica_lag(alias) <= max_lag]
+    return random.choice(fresh) if fresh else None
+
+
+def sync_sqlite_replica(alias):
+    """
+    Copia o banco primário para a réplica usando a API de backup do SQLite e grava
+    na própria réplica o marcador de sincronização. Serve como substituto local de
+    uma réplica de verdade.
+    """
+    started = time.time() # Escritas feitas durante a cópia contam como não replicadas
+    primary, replica = connections[PRIMARY_DB], connections[alias]
+    primary.ensure_connection()
+    replica.ensure_connection()
+    primary.connection.backup(replica.connection)
+    write_marker(alias, SYNCED, started)
+
+
+@contextmanager
+def replica_reads():
+    """
+    Envia as leituras feitas dentro do bloco para uma réplica, exceto quando
+    o cliente está fixado no primário ou nenhuma réplica está atualizada.
+    """
+    state = _request_state.get()
+    alias = None if state and state['pinned'] else pick_replica()
+    token = _replica_alias.set(alias)
+    try:
+        yield alias
+    finally:
+        _replica_alias.reset(token)
+
+
+class ReplicaReadMixin:
+    """
+    Mixin para views somente leitura: consultas da view e da renderização do
+    template vão para uma réplica.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        with replica_reads():
+            response = super().dispatch(request, *args, **kwargs)
+            # Renderiza aqui para que as consultas preguiçosas do template também usem a réplica
+            if hasattr(response, 'render') and callable(response.render):
+                response.render()
+        return response
+
+
+@receiver([post_save, post_delete], dispatch_uid='blog_record_write')
+def record_write(sender, **kwargs):
+    """
+    Marca a requisição atual como escritora (save/delete no primário) para que as
+    leituras seguintes e o cookie de fixação usem o primário. Não toca no banco:
+    o atraso da réplica é medido pela própria sincronização (ver replica_lag).
+    Operações em lote que não disparam sinais, como QuerySet.update() e bulk_create(),
+    não fixam o cliente.
+    """
+    if kwargs.get('using') != PRIMARY_DB:
+        return
+    if sender._meta.app_label in IGNORED_WRITE_APPS or sender._meta.label_lower in IGNORED_WRITE_MODELS:
+        return
+    state = _request_state.get()
+    if state is not None:
+        state['wrote'] = True
+
+
+class PrimaryReplicaRouter:
+    """
+    Escritas sempre no primário; leituras em réplica apenas dentro de replica_reads().
+    Depois de uma escrita, as leituras da mesma requisição voltam para o primário.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        if state and state['wrote']:
+            return PRIMARY_DB
+        return _replica_alias.get() or PRIMARY_DB
+
+    def db_for_write(self, model, **hints):
+        # Também é chamado para leituras que preparam escritas (get_or_create,
+        # select_for_update), por isso as escritas são registradas em record_write
+        return PRIMARY_DB
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY_DB, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # As réplicas recebem o esquema junto com os dados na sincronização
+        return db == PRIMARY_DB
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Garante read-your-writes: o cliente que acabou de escrever fica fixado no
+    primário por REPLICA_PIN_SECONDS, tempo suficiente para a réplica alcançá-lo.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            pinned = float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            pinned = False
+        state = {'pinned': pinned, 'wrote': False}
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+
+        if state['wrote']:
+            pin_seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 10)
+            response.set_cookie(PIN_COOKIE, str(time.time() + pin_seconds),
+                                max_age=pin_seconds, httponly=True, samesite='Lax')
+        return response
@@ -1,9 +1,22 @@
 # blog/tests.py
 
-from django.test import TestCase # Importa a classe base de testes do Django
+import time
+from io import StringIO
+from unittest import mock
+from django.test import RequestFactory, TestCase, TransactionTestCase # Importa as classes base de testes do Django
 from django.contrib.auth import get_user_model # Para obter o modelo de usuário do Django
+from django.core.cache import cache # Para limpar o cache da API entre os testes
+from django.core.management import call_command
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.http import HttpResponse
+from django.test.utils import CaptureQueriesContext # Para verificar em qual banco as consultas foram feitas
 from django.utils import timezone
-from .models import Category, Post, Comment # Importa seus modelos
+from .models import Category, Post, Comment, ReplicationMarker # Importa seus modelos
+from .views import COMMENTS_PER_PAGE, get_comment_page # Constante e helper da paginação de comentários
+from .api import API_PAGE_SIZE # Tamanho da página da API
+from .routers import (PIN_COOKIE, SYNCED, PrimaryReplicaRouter, ReplicaStickinessMiddleware,
+                      replica_lag, replica_reads, write_marker) # Roteamento primário/réplica
 from django.urls import reverse # Importa reverse para testar URLs
 
 # Obtém o modelo de usuário padrão do Django
@@ -150,6 +163,8 @@ class PostListViewTest(TestCase):
     """
     Testes para a PostListView (lista de posts).
     """
+    databases = {'default', 'replica'} # As views leem o marcador de sincronização da réplica
+
     def setUp(self):
         self.user = User.objects.create_user(username='testuserlist', password='password123')
         self.category = Category.objects.create(name='Test Category List')
@@ -215,6 +230,8 @@ class PostDetailViewTest(TestCase):
     """
     Testes para a PostDetailView (detalhes do post).
     """
+    databases = {'default', 'replica'} # As views leem o marcador de sincronização da réplica
+
     def setUp(self):
         self.user = User.objects.create_user(username='testuserdetail', password='password123')
         self.category = Category.objects.create(name='Test Category Detail')
@@ -278,4 +295,324 @@ class PostDetailViewTest(TestCase):
         self.assertNotContains(response, self.comment2.body) # Comentário inativo
         # Verifica se o comentário ativo está no contexto
         self.assertIn(self.comment1, response.context['comments'])
-        self.assertNotIn(self.comment2, response.context['comments'])
\ No newline at end of file
+        self.assertNotIn(self.comment2, response.context['comments'])
+
+class PostCommentsPaginationTest(TestCase):
+    """
+    Testes para a paginação por cursor (keyset) dos comentários.
+    """
+    databases = {'default', 'replica'} # As views leem o marcador de sincronização da réplica
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testusercomments', password='password123')
+        self.post = Post.objects.create(
+            title='Post With Many Comments',
+            slug='post-with-many-comments',
+            author=self.user,
+            body='Body of the post with many comments.',
+            status='published'
+        )
+        # Cria mais comentários do que cabem em uma página, todos com o mesmo created_at
+        # para garantir que o desempate por id funciona
+        same_time = timezone.now()
+        self.comments = [
+            Comment.objects.create(post=self.post, name=f'Commenter {i}', email=f'{i}@example.com',
+                                   body=f'Comment number {i:03d}.')
+            for i in range(COMMENTS_PER_PAGE + 5)
+        ]
+        Comment.objects.filter(post=self.post).update(created_at=same_time)
+        self.inactive = Comment.objects.create(post=self.post, name='Hidden', email='hidden@example.com',
+                                               body='Hidden comment.', active=False)
+
+    def test_detail_view_renders_only_first_page(self):
+        """Testa se a view de detalhes exibe apenas a primeira página de comentários."""
+        response = self.client.get(reverse('blog:post_detail', args=[self.post.slug]))
+        self.assertEqual(len(response.context['comments']), COMMENTS_PER_PAGE)
+        self.assertEqual(response.context['comment_count'], COMMENTS_PER_PAGE + 5)
+        self.assertIsNotNone(response.context['next_comments_url'])
+        self.assertNotContains(response, self.comments[-1].body)
+
+    def test_comments_endpoint_returns_next_page(self):
+        """Testa se o endpoint devolve os comentários restantes sem repetir nenhum."""
+        response = self.client.get(reverse('blog:post_detail', args=[self.post.slug]))
+        response = self.client.get(response.context['next_comments_url'])
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertIsNone(data['next'])
+        for comment in self.comments[COMMENTS_PER_PAGE:]:
+            self.assertIn(comment.body, data['html'])
+        self.assertNotIn(self.comments[COMMENTS_PER_PAGE - 1].body, data['html'])
+        self.assertNotIn(self.inactive.body, data['html'])
+
+    def test_comment_page_defers_unused_columns(self):
+        """Testa se email e updated_at não são carregados."""
+        comments, _ = get_comment_page(self.post)
+        self.assertEqual(comments[0].get_deferred_fields(), {'post_id', 'email', 'updated_at', 'active'})
+
+    def test_comments_endpoint_invalid_cursor(self):
+        """Testa se um cursor inválido retorna 400."""
+        response = self.client.get(reverse('blog:post_comments', args=[self.post.slug]), {'after': 'abc'})
+        self.assertEqual(response.status_code, 400)
+
+
+class BlogApiTest(TestCase):
+    """
+    Testes para a API JSON somente leitura.
+    """
+    databases = {'default', 'replica'} # As views leem o marcador de sincronização da réplica
+
+    def setUp(self):
+        cache.clear() # Evita payloads de outros testes no cache
+        self.user = User.objects.create_user(username='testuserapi', password='password123')
+        self.category = Category.objects.create(name='Api Category')
+        self.older_post = Post.objects.create(
+            title='Older Api Post',
+            slug='older-api-post',
+            author=self.user,
+            category=self.category,
+            body='Body of the older api post.',
+            status='published',
+            publish_date=timezone.now() - timezone.timedelta(days=2)
+        )
+        self.newer_post = Post.objects.create(
+            title='Newer Api Post',
+            slug='newer-api-post',
+            author=self.user,
+            body='Body of the newer api post.',
+            status='published',
+            publish_date=timezone.now() - timezone.timedelta(days=1)
+        )
+        self.draft_post = Post.objects.create(
+            title='Draft Api Post',
+            slug='draft-api-post',
+            author=self.user,
+            body='Body of the draft api post.',
+            status='draft'
+        )
+        self.comment = Comment.objects.create(post=self.older_post, name='Api Commenter',
+                                              email='api@example.com', body='Api comment.')
+
+    def test_post_list_returns_published_posts_in_order(self):
+        """Testa se a lista da API traz apenas posts publicados, do mais recente ao mais antigo."""
+        response = self.client.get(reverse('blog:api_post_list'))
+        self.assertEqual(response.status_code, 200)
+        slugs = [post['slug'] for post in response.json()['results']]
+        self.assertEqual(slugs, ['newer-api-post', 'older-api-post'])
+
+    def test_post_list_sparse_fieldset(self):
+        """Testa se ?fields= devolve apenas os campos pedidos."""
+        response = self.client.get(reverse('blog:api_post_list'), {'fields': 'title,author'})
+        self.assertEqual(response.json()['results'][1], {'title': 'Older Api Post', 'author': 'testuserapi'})
+
+    def test_post_list_invalid_field(self):
+        """Testa se um campo desconhecido retorna 400."""
+        response = self.client.get(reverse('blog:api_post_list'), {'fields': 'title,password'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_post_list_cursor_pagination(self):
+        """Testa se o cursor percorre todos os posts sem repetição."""
+        for i in range(API_PAGE_SIZE):
+            Post.objects.create(title=f'Extra {i}', slug=f'extra-{i}', author=self.user,
+                                body='Extra body.', status='published',
+                                publish_date=timezone.now() - timezone.timedelta(days=3))
+        data = self.client.get(reverse('blog:api_post_list'), {'fields': 'slug'}).json()
+        self.assertEqual(len(data['results']), API_PAGE_SIZE)
+        self.assertIn('fields=slug', data['next'])
+        second = self.client.get(data['next']).json()
+        self.assertIsNone(second['next'])
+        slugs = [post['slug'] for post in data['results'] + second['results']]
+        self.assertEqual(len(slugs), len(set(slugs)))
+        self.assertEqual(len(slugs), API_PAGE_SIZE + 2)
+
+    def test_post_list_cursor_before_1970(self):
+        """Testa se o cursor funciona com posts publicados antes de 1970 (microssegundos negativos)."""
+        for i in range(API_PAGE_SIZE):
+            Post.objects.create(title=f'Old {i}', slug=f'old-{i}', author=self.user,
+                                body='Old body.', status='published',
+                                publish_date=timezone.now().replace(year=1960))
+        data = self.client.get(reverse('blog:api_post_list'), {'fields': 'slug'}).json()
+        self.assertIn('after=-', data['next'])
+        response = self.client.get(data['next'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 2)
+
+    def test_post_detail_cache_is_invalidated_on_save(self):
+        """Testa se o payload em cache é renovado quando o post é alterado."""
+        url = reverse('blog:api_post_detail', args=[self.older_post.slug])
+        self.assertEqual(self.client.get(url).json()['title'], 'Older Api Post')
+        with self.assertNumQueries(1): # Apenas a consulta de id/updated_at (corpo vem do cache)
+            self.client.get(url)
+        self.older_post.title = 'Renamed Api Post'
+        self.older_post.save()
+        self.assertEqual(self.client.get(url).json()['title'], 'Renamed Api Post')
+
+    def test_post_cache_reflects_category_rename(self):
+        """Testa se renomear a categoria aparece na API mesmo com o post em cache."""
+        url = reverse('blog:api_post_detail', args=[self.older_post.slug])
+        self.assertEqual(self.client.get(url).json()['category'], 'Api Category')
+        self.category.name = 'Renamed Category'
+        self.category.save()
+        self.assertEqual(self.client.get(url).json()['category'], 'Renamed Category')
+        self.category.delete() # SET_NULL não altera Post.updated_at
+        self.assertIsNone(self.client.get(url).json()['category'])
+
+    def test_post_detail_deleted_during_request_404(self):
+        """Testa se um post removido entre as duas consultas retorna 404 em vez de erro 500."""
+        with mock.patch('blog.api.serialize_posts', return_value=[]):
+            response = self.client.get(reverse('blog:api_post_detail', args=[self.older_post.slug]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_post_detail_draft_404(self):
+        """Testa se posts rascunho não são expostos pela API."""
+        response = self.client.get(reverse('blog:api_post_detail', args=[self.draft_post.slug]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_category_list(self):
+        """Testa a lista de categorias."""
+        response = self.client.get(reverse('blog:api_category_list'))
+        self.assertEqual(response.json(), {'results': [{'id': self.category.id, 'name': 'Api Category'}], 'next': None})
+
+    def test_comment_list_hides_email(self):
+        """Testa se os comentários da API não expõem o email."""
+        response = self.client.get(reverse('blog:api_comment_list', args=[self.older_post.slug]))
+        results = response.json()['results']
+        self.assertEqual(results[0]['body'], 'Api comment.')
+        self.assertNotIn('email', results[0])
+
+    def test_responses_are_gzipped(self):
+        """Testa se as respostas da API são comprimidas com gzip quando o cliente aceita."""
+        response = self.client.get(reverse('blog:api_post_list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+
+class ReplicaRoutingTest(TransactionTestCase):
+    """
+    Testes para o roteamento de leituras entre o primário e a réplica.
+    Usa TransactionTestCase para que a cópia feita por sync_replica inclua
+    os dados criados no setUp.
+    """
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        self.user = User.objects.create_user(username='testuserreplica', password='password123')
+        self.post = Post.objects.create(
+            title='Replica Post',
+            slug='replica-post',
+            author=self.user,
+            body='Body of the replica post.',
+            status='published'
+        )
+
+    def tearDown(self):
+        # O flush do teste não alcança as tabelas da réplica (allow_migrate é False nela)
+        try:
+            ReplicationMarker.objects.using('replica').all().delete()
+        except DatabaseError: # Réplica ainda vazia
+            pass
+
+    def sync_replica(self):
+        # Sincroniza pelo comando real; o marcador fica gravado na própria réplica
+        call_command('sync_replica', stdout=StringIO())
+
+    def test_reads_outside_read_views_use_primary(self):
+        """Testa se leituras fora de replica_reads() vão para o primário."""
+        self.sync_replica()
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_writes_always_use_primary(self):
+        """Testa se escritas sempre vão para o primário, mesmo dentro de replica_reads()."""
+        self.sync_replica()
+        with replica_reads():
+            self.assertEqual(self.router.db_for_write(Post), 'default')
+
+    def test_read_views_use_synced_replica(self):
+        """Testa se as leituras vão para a réplica quando ela está sincronizada."""
+        self.sync_replica()
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+    def test_sync_replica_command_enables_replica(self):
+        """Testa se o comando sync_replica grava o marcador que libera a réplica."""
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+        call_command('sync_replica', stdout=StringIO())
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+    def test_unsynced_replica_falls_back_to_primary(self):
+        """Testa se uma réplica nunca sincronizada não é usada."""
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        """Testa se uma réplica atrasada além de REPLICA_MAX_LAG não é usada."""
+        self.sync_replica()
+        write_marker('replica', SYNCED, time.time() - 60)
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_replica_behind_within_max_lag_is_used(self):
+        """Testa se uma réplica com atraso tolerável continua sendo usada."""
+        self.sync_replica()
+        write_marker('replica', SYNCED, time.time() - 1)
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+    def test_post_list_view_reads_from_replica(self):
+        """Testa se a PostListView consulta a réplica, inclusive durante a renderização."""
+        self.sync_replica()
+        with CaptureQueriesContext(connections['replica']) as replica_queries, \
+                CaptureQueriesContext(connections['default']) as primary_queries:
+            response = self.client.get(reverse('blog:post_list'))
+        self.assertContains(response, self.post.title)
+        self.assertTrue(replica_queries.captured_queries)
+        self.assertFalse(primary_queries.captured_queries) # Nem o marcador é lido no primário
+
+    def test_write_uncommitted_during_sync_expires_replica(self):
+        """Testa se uma escrita confirmada depois do início da cópia não deixa a réplica 'em dia' para sempre."""
+        with transaction.atomic():
+            Comment.objects.create(post=self.post, name='Late', email='late@example.com', body='Late comment.')
+            synced_at = time.time() # A cópia começa antes do commit e não inclui o comentário
+        self.sync_replica()
+        write_marker('replica', SYNCED, synced_at)
+
+        self.assertLessEqual(replica_lag('replica', now=synced_at + 1), settings.REPLICA_MAX_LAG)
+        self.assertGreater(replica_lag('replica', now=synced_at + settings.REPLICA_MAX_LAG + 1),
+                           settings.REPLICA_MAX_LAG)
+
+    def test_reads_preparing_writes_do_not_pin_client(self):
+        """Testa se get_or_create de um objeto existente não conta como escrita."""
+        def read_view(request):
+            Post.objects.get_or_create(slug=self.post.slug, defaults={'author': self.user})
+            return HttpResponse()
+
+        response = ReplicaStickinessMiddleware(read_view)(RequestFactory().get('/'))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_write_pins_client_to_primary(self):
+        """Testa read-your-writes: depois de escrever, o cliente lê do primário."""
+        self.sync_replica()
+
+        def write_view(request):
+            Comment.objects.create(post=self.post, name='Writer', email='writer@example.com', body='New comment.')
+            # Na mesma requisição, as leituras após a escrita também vão para o primário
+            with replica_reads():
+                self.assertEqual(self.router.db_for_read(Comment), 'default')
+            return HttpResponse()
+
+        response = ReplicaStickinessMiddleware(write_view)(RequestFactory().get('/'))
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+        # Próxima requisição do mesmo cliente: continua no primário
+        self.client.cookies[PIN_COOKIE] = response.cookies[PIN_COOKIE].value
+        with CaptureQueriesContext(connections['replica']) as replica_queries:
+            response = self.client.get(reverse('blog:post_detail', args=[self.post.slug]))
+        self.assertContains(response, 'New comment.')
+        self.assertFalse(replica_queries.captured_queries)
+
+        # Um cliente sem o cookie volta a ler da réplica
+        self.client.cookies.clear()
+        with CaptureQueriesContext(connections['replica']) as replica_queries:
+            self.client.get(reverse('blog:post_detail', args=[self.post.slug]))
+        self.assertTrue(replica_queries.captured_queries)
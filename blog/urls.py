@@ -1,7 +1,7 @@
 # blog/urls.py 
 
 from django.urls import path 
-from . import views # Importa as views do app blog 
+from . import api, views # Importa as views do app blog 
 
 app_name = 'blog' # Define o namespace para as URLs do app blog 
 
@@ -9,6 +9,15 @@ urlpatterns = [
     # URL para a lista de posts 
     path('', views.PostListView.as_view(), name='post_list'),
 
+    # API JSON somente leitura para posts, categorias e comentários
+    path('api/posts/', api.PostListApiView.as_view(), name='api_post_list'),
+    path('api/posts/<slug:slug>/', api.PostDetailApiView.as_view(), name='api_post_detail'),
+    path('api/posts/<slug:slug>/comments/', api.CommentListApiView.as_view(), name='api_comment_list'),
+    path('api/categories/', api.CategoryListApiView.as_view(), name='api_category_list'),
+
     # URL para detalhes de um post especifico (usando slug)
     path('<slug:slug>/', views.PostDetailView.as_view(), name='post_detail'),
+
+    # URL que devolve as próximas páginas de comentários de um post (JSON + fragmento HTML)
+    path('<slug:slug>/comments/', views.PostCommentsView.as_view(), name='post_comments'),
 ]
@@ -1,19 +1,86 @@
-# blog/views.py 
+# blog/views.py
 
-from django.views.generic import ListView, DetailView 
-from .models import Post, Category, Comment # importa os modelos 
+from datetime import datetime, timedelta, timezone as dt_timezone
 
-class PostListView(ListView):
-    model = Post # Indica qual modelo deve usar 
+from django.db.models import Q
+from django.http import HttpResponseBadRequest, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.views import View
+from django.views.generic import ListView, DetailView
+from .models import Post, Category, Comment # importa os modelos
+from .routers import ReplicaReadMixin
+
+COMMENTS_PER_PAGE = 20 # Quantidade de comentários carregados por vez
+COMMENT_FIELDS = ('name', 'body', 'created_at') # Colunas exibidas no template (sem email/updated_at)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def encode_cursor(moment, pk):
+    # Cursor opaco no formato "<microssegundos desde epoch>-<id>"
+    micros = (moment - _EPOCH) // timedelta(microseconds=1)
+    return f'{micros}-{pk}'
+
+
+def decode_cursor(cursor):
+    # Converte o cursor de volta para (data, id); levanta ValueError se inválido.
+    # rsplit: datas antes de 1970 geram microssegundos negativos ("-123-5")
+    micros, pk = cursor.rsplit('-', 1)
+    return _EPOCH + timedelta(microseconds=int(micros)), int(pk)
+
+
+def paginate_keyset(queryset, field, after=None, per_page=COMMENTS_PER_PAGE, descending=False):
+    """
+    Pagina o queryset por cursor (keyset) em (field, id) e retorna (itens, próximo_cursor).
+    Funciona tanto com instâncias quanto com dicionários vindos de values().
+    Busca um item a mais para saber se existe uma próxima página.
+    """
+    op = 'lt' if descending else 'gt'
+    if after is not None:
+        moment, pk = decode_cursor(after)
+        queryset = queryset.filter(
+            Q(**{f'{field}__{op}': moment}) | Q(**{field: moment, f'id__{op}': pk})
+        )
+    ordering = (f'-{field}', '-id') if descending else (field, 'id')
+
+    rows = list(queryset.order_by(*ordering)[:per_page + 1])
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        if isinstance(last, dict):
+            next_cursor = encode_cursor(last[field], last['id'])
+        else:
+            next_cursor = encode_cursor(getattr(last, field), last.pk)
+    return rows, next_cursor
+
+
+def get_comment_page(post, after=None, per_page=COMMENTS_PER_PAGE):
+    # Retorna uma página de comentários ativos carregando apenas as colunas exibidas
+    queryset = Comment.objects.filter(post=post, active=True).only(*COMMENT_FIELDS)
+    return paginate_keyset(queryset, 'created_at', after=after, per_page=per_page)
+
+
+def comment_page_url(post, cursor):
+    # URL do endpoint de comentários para a próxima página (ou None se não houver)
+    if cursor is None:
+        return None
+    return f"{reverse('blog:post_comments', args=[post.slug])}?after={cursor}"
+
+
+class PostListView(ReplicaReadMixin, ListView):
+    model = Post # Indica qual modelo deve usar
     template_name = 'blog/post_list.html' # Indica qual template usar
     context_object_name = 'posts' # Nome da variável que será passada para o template (por padrão seria 'object_list')
     queryset = Post.objects.filter(status='published').order_by('-publish_date') # Filtra apenas posts publicados
     paginate_by = 10 # Define a quantidade de posts por página
 
 
-class PostDetailView(DetailView):
+class PostDetailView(ReplicaReadMixin, DetailView):
     model = Post # Indica qual modelo deve usar
-    template_name = 'blog/post_detail.html' # Indica qual template usar 
+    template_name = 'blog/post_detail.html' # Indica qual template usar
     context_object_name = 'post' # Nome da variável que será passada para o template
     slug_field = 'slug' # Indica que a URL usa o campo slug para buscar o objeto
     slug_url_kwarg = 'slug' # Garante que o argumento da URL seja 'slug'
@@ -22,17 +89,37 @@ class PostDetailView(DetailView):
     def get_queryset(self):
         # Garante que apenas posts publicados serão mostrados
         return Post.objects.filter(status='published')
-    
+
     def get_context_data(self, **kwargs):
         # Adiciona os comentários e o formulário de comentários ao contexto
         context = super().get_context_data(**kwargs)
 
-        # Carrega apenas comentários ativos para este post 
-        context['comments'] = self.object.comments.filter(active=True)
+        # Carrega apenas a primeira página de comentários ativos para este post
+        comments, next_cursor = get_comment_page(self.object)
+        context['comments'] = comments
+        context['comment_count'] = self.object.comments.filter(active=True).count()
+        context['next_comments_url'] = comment_page_url(self.object, next_cursor)
         # No momento não temos o formulário de comentários, mas vamos deixar pronto.
         # from .forms import CommentForm # Isso será descomentado na Tarefa 13
         # context['comment_form'] = CommentForm() # Isso será descomentado na Tarefa 13
         return context
 
 
+class PostCommentsView(ReplicaReadMixin, View):
+    """
+    Endpoint leve que devolve uma página de comentários em JSON,
+    com o fragmento HTML já renderizado e a URL da próxima página.
+    """
+
+    def get(self, request, slug):
+        post = get_object_or_404(Post.objects.only('id', 'slug'), slug=slug, status='published')
+        try:
+            comments, next_cursor = get_comment_page(post, after=request.GET.get('after'))
+        except (ValueError, OverflowError):
+            return HttpResponseBadRequest('Cursor de comentários inválido.')
 
+        html = render_to_string('blog/comment_list.html', {'comments': comments}, request=request)
+        return JsonResponse({
+            'html': html,
+            'next': comment_page_url(post, next_cursor),
+        })